@@ -28,6 +28,9 @@ PROTOCOL:
     - "error" (string|null): The traceback if an error occurred.
     - "stdout" (string): Captured output from print statements.
     - "stderr" (string): Captured error stream output.
+- Persistent mode (`--serve`): stdin carries one JSON request per line and 
+  stdout receives one JSON response per line, flushed after each request, so a 
+  single long-lived worker can process many tasks.
 
 SECURITY MODEL:
 The sandbox is implemented by overriding the `__builtins__` in the `exec()` 
@@ -37,13 +40,50 @@ and should be used with caution in highly hostile environments.
 """
 
 import sys
-import json
 import traceback
 import io
-from contextlib import redirect_stdout, redirect_stderr
+from functools import lru_cache
 
 import builtins
 
+def _import_private(name):
+    """
+    Imports a fresh copy of a pure-Python package without registering it in
+    sys.modules.
+
+    Task code may import the same package (e.g. 'json' is an allowed import)
+    and, in --serve mode, patch its attributes or submodule globals. The runner's
+    own protocol I/O uses the private copy, so such patches cannot forge or
+    rewrite the responses and requests of later tasks.
+    """
+    prefix = name + "."
+    saved = {key: mod for key, mod in sys.modules.items() if key == name or key.startswith(prefix)}
+    for key in saved:
+        del sys.modules[key]
+    try:
+        return __import__(name)
+    finally:
+        for key in [key for key in sys.modules if key == name or key.startswith(prefix)]:
+            del sys.modules[key]
+        sys.modules.update(saved)
+
+# The protocol's JSON functions are bound once at import time and never looked
+# up through a module object that task code can reach.
+_private_json = _import_private("json")
+_std_dumps = _private_json.dumps
+_std_loads = _private_json.loads
+JSONDecodeError = _private_json.JSONDecodeError
+del _private_json
+
+# Prefer orjson for serializing responses (C-level encoding); fall back to the
+# standard library when it isn't installed. Requests are always parsed with the
+# standard library, see _loads().
+try:
+    from orjson import dumps as _orjson_dumps, OPT_NON_STR_KEYS, OPT_APPEND_NEWLINE
+    _ORJSON_OPTIONS = OPT_NON_STR_KEYS | OPT_APPEND_NEWLINE
+except ImportError:
+    _orjson_dumps = None
+
 # A set of built-in functions and exceptions considered safe for the execution sandbox.
 # This prevents access to dangerous operations like file system access (open), 
 # process management (os.system), etc., while allowing common data processing tasks.
@@ -68,6 +108,60 @@ SAFE_BUILTINS = {
     'super', 'property', 'classmethod', 'staticmethod'
 }
 
+# The whitelisted built-ins resolved once at import time. Each execution gets a
+# shallow copy so that adding, replacing or deleting entries in its __builtins__
+# does not change the built-ins dict of the next task when the worker is reused
+# (see --serve). The built-in objects themselves and imported modules are still
+# shared between tasks.
+_SAFE_BUILTINS_DICT = {name: getattr(builtins, name) for name in SAFE_BUILTINS if hasattr(builtins, name)}
+
+def _dumps(obj):
+    """
+    Serializes a response object to a compact, newline-terminated JSON line.
+
+    orjson is used when available; values it cannot represent (e.g. integers
+    wider than 64 bits) fall back to the standard library encoder.
+    """
+    if _orjson_dumps is not None:
+        try:
+            return _orjson_dumps(obj, option=_ORJSON_OPTIONS)
+        except TypeError:
+            pass
+    return (_std_dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+def _loads(data):
+    """
+    Parses a JSON request with the standard library.
+
+    orjson is deliberately not used here: it rejects lone surrogates (which
+    JSON.stringify emits) and silently turns integers wider than 64 bits into
+    floats, while json.loads accepts both unchanged. Requests are small, so
+    the parse is not on the critical path.
+    """
+    try:
+        return _std_loads(data)
+    except Exception as e:
+        # The C scanner raises whichever JSONDecodeError class sys.modules holds
+        # at that moment (which task code can replace), not the private copy's;
+        # normalize so callers can rely on the privately bound class.
+        # Undecodable bytes end up here too.
+        raise JSONDecodeError(getattr(e, "msg", str(e)), getattr(e, "doc", ""), getattr(e, "pos", 0)) from None
+
+def _emit(obj):
+    """
+    Writes a single JSON response line to the binary stdout buffer, bypassing
+    the text layer. Callers are responsible for flushing.
+    """
+    sys.stdout.buffer.write(_dumps(obj))
+
+@lru_cache(maxsize=256)
+def _compile(code_str):
+    """
+    Compiles a task's source to a code object, caching by source string so
+    repeated submissions of the same snippet skip parsing and compilation.
+    """
+    return compile(code_str, "<sandbox>", "exec")
+
 def execute_task(code_str, params):
     """
     Executes a given Python code string in a restricted environment.
@@ -80,15 +174,12 @@ def execute_task(code_str, params):
         dict: A dictionary containing 'success', 'data' (return value), 'error' (traceback if failed),
               'stdout', and 'stderr'.
     """
-    # Prepare the sandbox scope by populating it only with safe built-ins
-    safe_builtins_dict = {}
-    for name in SAFE_BUILTINS:
-        if hasattr(builtins, name):
-            safe_builtins_dict[name] = getattr(builtins, name)
-
-    # The sandbox globals: restricted built-ins and the input parameters
+    # The sandbox globals: restricted built-ins and the input parameters.
+    # A two-key literal is as cheap as copying a prebuilt template; the cost that
+    # matters is the built-ins copy, which keeps edits to one task's built-ins
+    # dict from reaching later tasks (module state is still shared).
     sandbox = {
-        '__builtins__': safe_builtins_dict,
+        '__builtins__': _SAFE_BUILTINS_DICT.copy(),
         'params': params
     }
     
@@ -100,25 +191,31 @@ def execute_task(code_str, params):
     success = False
     error_msg = None
     
+    # Redirect standard output and error to our buffers. The streams are swapped
+    # directly rather than through contextlib.redirect_* to keep per-call overhead low.
+    saved_stdout, saved_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = stdout_capture, stderr_capture
     try:
-        # Redirect standard output and error to our string buffers
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            # 1. Execute the code string to populate the sandbox namespace.
-            # This should define the 'run' function.
-            exec(code_str, sandbox)
-            
-            # 2. Verify that the required 'run' function was defined and is callable.
-            if 'run' not in sandbox or not callable(sandbox['run']):
-                raise ValueError("Code must define a 'run(params)' function.")
-            
-            # 3. Call the 'run' function with the provided parameters and capture the result.
-            result_data = sandbox['run'](params)
-            success = True
+        # 1. Execute the code string to populate the sandbox namespace.
+        # This should define the 'run' function.
+        exec(_compile(code_str), sandbox)
+        
+        # 2. Verify that the required 'run' function was defined and is callable.
+        if 'run' not in sandbox or not callable(sandbox['run']):
+            raise ValueError("Code must define a 'run(params)' function.")
+        
+        # 3. Call the 'run' function with the provided parameters and capture the result.
+        result_data = sandbox['run'](params)
+        success = True
             
-    except Exception:
-        # Capture the full traceback if an error occurs during execution
+    except BaseException:
+        # Capture the full traceback if an error occurs during execution. This
+        # includes SystemExit, KeyboardInterrupt and GeneratorExit, which are in
+        # SAFE_BUILTINS and must not take down a reused worker (see --serve).
         error_msg = traceback.format_exc()
         success = False
+    finally:
+        sys.stdout, sys.stderr = saved_stdout, saved_stderr
     
     # Return the structured execution result
     return {
@@ -129,31 +226,80 @@ def execute_task(code_str, params):
         "stderr": stderr_capture.getvalue()
     }
 
+def handle_request(request):
+    """
+    Executes a single decoded request and builds its JSON response.
+
+    Args:
+        request (dict): The request object with 'code' and optional 'params'.
+
+    Returns:
+        tuple: The response object to be written back to the host, and the exit
+               status a one-shot run should use (1 if the request had no code).
+    """
+    code = request.get('code')
+    params = request.get('params', {})
+
+    if not code:
+        return {"success": False, "error": "No code provided"}, 1
+
+    return execute_task(code, params), 0
+
+def serve():
+    """
+    Persistent worker mode: reads newline-delimited JSON requests from stdin
+    and writes one JSON response line per request, flushing after each so the
+    host can reuse a single long-lived process instead of spawning per task.
+
+    All tasks share the interpreter's module state (sys.modules): a module
+    imported or modified by one task is seen, modified, by every later task.
+    The runner's own request parsing and response encoding use privately bound
+    JSON functions that task code cannot patch, but tasks are not isolated from
+    each other; use one-shot mode when they must be.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            result, _ = handle_request(_loads(line))
+        except JSONDecodeError:
+            result = {"success": False, "error": "Invalid JSON input"}
+        except Exception as e:
+            result = {"success": False, "error": f"Runner System Error: {str(e)}"}
+        try:
+            _emit(result)
+        except Exception as e:
+            _emit({"success": False, "error": f"Runner System Error: {str(e)}"})
+        sys.stdout.buffer.flush()
+
 if __name__ == "__main__":
+    if "--serve" in sys.argv:
+        serve()
+        sys.exit(0)
+
     # The script acts as a CLI tool that reads a JSON request from stdin and writes a JSON response to stdout.
     try:
-        # Read the entire input from stdin
-        input_str = sys.stdin.read()
-        if not input_str:
-            print(json.dumps({"success": False, "error": "No input provided"}))
+        # Read the raw request bytes from stdin; both JSON backends parse bytes
+        # directly, which avoids decoding into an intermediate str first.
+        input_bytes = sys.stdin.buffer.read()
+        if not input_bytes:
+            _emit({"success": False, "error": "No input provided"})
             sys.exit(1)
             
         # Parse the input JSON which should contain 'code' and optionally 'params'
-        request = json.loads(input_str)
-        code = request.get('code')
-        params = request.get('params', {})
-        
-        if not code:
-            print(json.dumps({"success": False, "error": "No code provided"}))
-            sys.exit(1)
-            
+        request = _loads(input_bytes)
+
         # Execute the task and output the result as a JSON string
-        result = execute_task(code, params)
-        print(json.dumps(result))
+        result, status = handle_request(request)
+        _emit(result)
+        if status:
+            sys.exit(status)
         
-    except json.JSONDecodeError:
+    except JSONDecodeError:
         # Handle cases where stdin does not contain valid JSON
-        print(json.dumps({"success": False, "error": "Invalid JSON input"}))
+        _emit({"success": False, "error": "Invalid JSON input"})
     except Exception as e:
         # Catch any other unexpected system-level errors
-        print(json.dumps({"success": False, "error": f"Runner System Error: {str(e)}"}))
+        _emit({"success": False, "error": f"Runner System Error: {str(e)}"})
+    finally:
+        sys.stdout.buffer.flush()
@@ -2,20 +2,40 @@
 """
 macOS 自动化权限检查与修复脚本
 """
+import os
+import sqlite3
 import subprocess
 import sys
+from pathlib import Path
 
-def check_accessibility_permission(app_name):
+TCC_DB_PATH = os.path.expanduser("~/Library/Application Support/com.apple.TCC/TCC.db")
+
+def load_accessibility_entries():
+    """一次性读取 TCC.db 中所有辅助功能权限记录，返回 (client, allowed) 列表"""
+    try:
+        # 以只读方式打开数据库，只查询一次
+        con = sqlite3.connect(Path(TCC_DB_PATH).as_uri() + "?mode=ro", uri=True)
+        try:
+            return con.execute(
+                "SELECT client, allowed FROM access WHERE service='kTCCServiceAccessibility'"
+            ).fetchall()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        # 数据库不存在或无权读取时，视为没有任何记录
+        return []
+
+def check_accessibility_permission(app_name, entries=None):
     """检查指定应用是否拥有辅助功能权限"""
     try:
-        # 检查系统设置中的权限列表
-        check_cmd = f'''sqlite3 ~/Library/Application\ Support/com.apple.TCC/TCC.db \\
-        "SELECT service, client, allowed FROM access WHERE service='kTCCServiceAccessibility' AND client LIKE '%{app_name}%'" 2>/dev/null'''
-        
-        check_result = subprocess.run(check_cmd, shell=True, capture_output=True, text=True)
-        if "|1" in check_result.stdout:
+        if entries is None:
+            entries = load_accessibility_entries()
+        # 与 SQL 的 LIKE '%name%' 一致：不区分大小写的子串匹配
+        needle = app_name.lower()
+        allowed_values = [allowed for client, allowed in entries if needle in str(client).lower()]
+        if 1 in allowed_values:
             return True, "已授权"
-        elif "|0" in check_result.stdout:
+        elif 0 in allowed_values:
             return False, "已拒绝"
         else:
             return False, "未设置"
@@ -24,6 +44,8 @@ def check_accessibility_permission(app_name):
 
 def request_accessibility_permission(app_name):
     """尝试请求辅助功能权限（会弹出系统对话框）"""
+    # 注意：此操作依赖前台焦点（先激活应用，再向当前前台应用发送按键），
+    # 多个应用并发执行会互相抢占焦点、把按键发给错误的应用，因此必须串行调用。
     try:
         script = f'''tell application "{app_name}" to activate
 delay 1
@@ -37,9 +59,11 @@ tell application "System Events" to keystroke " "
 def main():
     apps_to_check = ["Terminal", "iTerm", "Python", "WeChat"]
     print("🔍 正在检查 macOS 辅助功能权限...")
+    entries = load_accessibility_entries()
+    # 权限检查只读取内存中的记录，开销很小，无需并发
+    results = [(app, check_accessibility_permission(app, entries)) for app in apps_to_check]
     
-    for app in apps_to_check:
-        has_perm, status = check_accessibility_permission(app)
+    for app, (has_perm, status) in results:
         print(f"\n[应用查看] {app}: {status}")
         
         if not has_perm and status == "未设置":
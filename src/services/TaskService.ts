@@ -547,6 +547,11 @@ def run(params):
 
       this.runningProcesses.set(taskId, child);
 
+      // The runner writes raw UTF-8, so decode through the stream's StringDecoder
+      // to keep multi-byte characters intact when they span pipe chunks.
+      child.stdout.setEncoding('utf8');
+      child.stderr.setEncoding('utf8');
+
       let stdout = '';
       let stderr = '';
       const MAX_BUFFER = 1024 * 1024 * 5; // 5MB limit